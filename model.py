@@ -1,10 +1,132 @@
+import math
+from dataclasses import dataclass
+from functools import cached_property
+
 import numpy as np
-from scipy import optimize
 
 from utils import WORK_HOURS_PER_YEAR, DEFAULT_LABOR_DISUTILITY_FACTOR
 
 
+@dataclass
+class AgentArray:
+    """Structure-of-arrays layout for the agent population.
+
+    One ndarray per attribute instead of a list of Agent objects, so the
+    per-iteration updates in simulate_society can be vectorized.
+    """
+
+    potential_income: np.ndarray
+    wage_rate: np.ndarray
+    labor_supply: np.ndarray
+    speeding: np.ndarray
+    fine: np.ndarray
+    # The utility factors are identical across agents, so one scalar
+    # each rather than N copies; NumPy broadcasting handles the rest.
+    income_utility_factor: float
+    labor_disutility_factor: float
+    speeding_utility_factor: float
+
+    @classmethod
+    def from_incomes(
+        cls,
+        incomes,
+        income_utility_factor,
+        labor_disutility_factor,
+        speeding_utility_factor,
+    ):
+        # Guarantee a C-contiguous float64 column regardless of what the
+        # caller passes (list, buffer view, ...), without copying when
+        # the input already qualifies.
+        incomes = np.ascontiguousarray(incomes, dtype=np.float64)
+        n = incomes.size
+        return cls(
+            potential_income=incomes,
+            # Immutable wage column stays float64: the solver takes its
+            # derivatives in double precision anyway, so a float32 copy
+            # would just be re-promoted on every solve.
+            wage_rate=incomes / WORK_HOURS_PER_YEAR,
+            # Mutable state columns only need ~4 significant digits, so
+            # float32 halves the memory traffic of the iteration loop.
+            labor_supply=np.zeros(n, dtype=np.float32),
+            speeding=np.zeros(n, dtype=np.float32),
+            fine=np.zeros(n, dtype=np.float32),
+            income_utility_factor=float(income_utility_factor),
+            labor_disutility_factor=float(labor_disutility_factor),
+            speeding_utility_factor=float(speeding_utility_factor),
+        )
+
+    def __len__(self):
+        return self.potential_income.size
+
+    def reset(self):
+        """Zero the mutable state so the population can be re-simulated."""
+        self.labor_supply[:] = 0.0
+        self.speeding[:] = 0.0
+        self.fine[:] = 0.0
+
+    def copy(self):
+        """Snapshot with copied mutable state (incomes are immutable)."""
+        return AgentArray(
+            potential_income=self.potential_income,
+            wage_rate=self.wage_rate,
+            labor_supply=self.labor_supply.copy(),
+            speeding=self.speeding.copy(),
+            fine=self.fine.copy(),
+            income_utility_factor=self.income_utility_factor,
+            labor_disutility_factor=self.labor_disutility_factor,
+            speeding_utility_factor=self.speeding_utility_factor,
+        )
+
+    @cached_property
+    def group_index(self):
+        """Tercile index (0=low, 1=middle, 2=high) per agent.
+
+        Computed once per population since incomes never change within a
+        simulation; group aggregations can then use np.bincount.
+        """
+        cuts = np.quantile(self.potential_income, [1 / 3, 2 / 3])
+        return np.digitize(self.potential_income, cuts)
+
+    def calculate_utility(
+        self, labor_hours, speeding, fine_function, death_prob, ubi, tax_rate, vsl
+    ):
+        """Vectorized utility over the whole population."""
+        gross_income = self.wage_rate * labor_hours
+        fine = fine_function(gross_income) * speeding
+        tax = gross_income * tax_rate
+        net_income = gross_income - fine - tax + ubi
+
+        labor_disutility = (
+            self.labor_disutility_factor
+            * (labor_hours**2)
+            / (2 * WORK_HOURS_PER_YEAR)
+        )
+
+        return (
+            -labor_disutility
+            + self.speeding_utility_factor * np.log(1 + speeding)
+            - death_prob * speeding * vsl
+            # Same floor on the income log as the scalar solver.
+            + self.income_utility_factor
+            * np.log(np.maximum(1 + net_income, 1e-9))
+        )
+
+
 class Agent:
+    # Fixed slots instead of a per-instance __dict__; the attribute set
+    # is stable and this keeps bulk Agent construction compact.
+    __slots__ = (
+        "potential_income",
+        "wage_rate",
+        "labor_supply",
+        "speeding",
+        "fine",
+        "income_utility_factor",
+        "speeding_utility_factor",
+        "_labor_disutility_factor",
+        "_labor_disutility_coef",
+    )
+
     def __init__(
         self,
         potential_income,
@@ -12,7 +134,7 @@ class Agent:
         labor_disutility_factor,
         speeding_utility_factor,
     ):
-        self.potential_income = np.float64(potential_income)
+        self.potential_income = potential_income
         self.wage_rate = self.potential_income / WORK_HOURS_PER_YEAR
         self.labor_supply = 0.0  # In hours
         self.speeding = 0.0
@@ -21,6 +143,18 @@ class Agent:
         self.labor_disutility_factor = labor_disutility_factor
         self.speeding_utility_factor = speeding_utility_factor
 
+    @property
+    def labor_disutility_factor(self):
+        return self._labor_disutility_factor
+
+    @labor_disutility_factor.setter
+    def labor_disutility_factor(self, value):
+        self._labor_disutility_factor = value
+        # Constant part of the quadratic labor disutility, precomputed
+        # so the per-evaluation cost is one multiply. Kept in sync here
+        # because the utility explorer reassigns the factor directly.
+        self._labor_disutility_coef = value / (2 * WORK_HOURS_PER_YEAR)
+
     def calculate_utility(
         self,
         labor_hours,
@@ -31,52 +165,222 @@ class Agent:
         tax_rate,
         vsl,
     ):
+        # Locals beat repeated LOAD_ATTR in this frequently-called body.
+        ldu_coef = self._labor_disutility_coef
+        suf = self.speeding_utility_factor
+        iuf = self.income_utility_factor
+
         gross_income = self.wage_rate * labor_hours
         fine = fine_function(gross_income) * speeding
         tax = gross_income * tax_rate
         net_income = gross_income - fine - tax + ubi
 
         # Simplified labor disutility calculation
-        labor_disutility = (
-            self.labor_disutility_factor
-            * (labor_hours**2)
-            / (2 * WORK_HOURS_PER_YEAR)
-        )
+        labor_disutility = ldu_coef * labor_hours * labor_hours
 
+        # math.log1p avoids numpy's ufunc dispatch on scalars; guard the
+        # income log against net income at or below -1.
         utility = (
             -labor_disutility
-            + self.speeding_utility_factor * np.log(1 + speeding)
+            + suf * math.log1p(speeding)
+            - death_prob * speeding * vsl
+            + iuf * math.log(max(1.0 + net_income, 1e-9))
+        )
+        return utility
+
+    def calculate_utility_curve(
+        self,
+        labor_hours,
+        speeding,
+        fine_function,
+        death_prob,
+        ubi,
+        tax_rate,
+        vsl,
+    ):
+        """calculate_utility over an array of labor hours in one pass.
+
+        Lets the utility explorer sweep the labor axis as a single NumPy
+        expression instead of one Python call per grid point.
+        """
+        labor_hours = np.asarray(labor_hours, dtype=np.float64)
+        gross_income = self.wage_rate * labor_hours
+        fine = fine_function(gross_income) * speeding
+        tax = gross_income * tax_rate
+        net_income = gross_income - fine - tax + ubi
+
+        return (
+            -self._labor_disutility_coef * labor_hours**2
+            + self.speeding_utility_factor * math.log1p(speeding)
             - death_prob * speeding * vsl
-            + self.income_utility_factor * np.log(1 + net_income)
+            + self.income_utility_factor
+            * np.log(np.maximum(1.0 + net_income, 1e-9))
         )
-        return np.float64(utility)
 
     def optimize(self, fine_function, death_prob, ubi, tax_rate, vsl):
-        def objective(x):
-            labor_hours, speeding = x
-            return -self.calculate_utility(
-                labor_hours,
-                speeding,
-                fine_function,
-                death_prob,
-                ubi,
-                tax_rate,
-                vsl,
-            )
+        """Solve the agent's problem from its first-order conditions.
+
+        The objective is concave in each choice variable, so two
+        Gauss-Seidel sweeps — a short Newton solve for labor holding
+        speeding fixed, then the closed-form speeding optimum — replace
+        the previous L-BFGS-B call with plain arithmetic. Assumes an
+        affine fine schedule, as both built-in fine functions are.
+        """
+        fine_base = fine_function(0.0)
+        fine_slope = fine_function(1.0) - fine_base
+
+        w = self.wage_rate
+        iuf = self.income_utility_factor
+        suf = self.speeding_utility_factor
+        ldf_norm = self.labor_disutility_factor / WORK_HOURS_PER_YEAR
+
+        labor, speeding = 1040.0, 0.5
+        for _ in range(2):
+            # Labor FOC via Newton, holding speeding fixed.
+            for _ in range(5):
+                gross = w * labor
+                fine_rate = fine_base + fine_slope * gross
+                net = gross - fine_rate * speeding - gross * tax_rate + ubi
+                denom = max(1.0 + net, 1e-9)
+                net_l = w * (1.0 - tax_rate - fine_slope * speeding)
+                grad = -ldf_norm * labor + iuf * net_l / denom
+                hess = -ldf_norm - iuf * (net_l / denom) ** 2
+                labor = min(max(labor - grad / hess, 0.0), 2080.0)
+
+            # Speeding FOC has a closed form given labor.
+            gross = w * labor
+            fine_rate = fine_base + fine_slope * gross
+            net = gross - fine_rate * speeding - gross * tax_rate + ubi
+            denom = max(1.0 + net, 1e-9)
+            marginal_cost = death_prob * vsl + iuf * fine_rate / denom
+            if marginal_cost > 0:
+                speeding = min(max(suf / marginal_cost - 1.0, 0.0), 1.0)
+            else:
+                speeding = 1.0
+
+        self.labor_supply = labor
+        self.speeding = speeding
+        self.fine = fine_function(w * labor) * speeding
+        return self.calculate_utility(
+            labor, speeding, fine_function, death_prob, ubi, tax_rate, vsl
+        )
+
+
+def _optimize_population(
+    agents, fine_base, fine_slope, death_prob, ubi, tax_rate, vsl, num_steps=25
+):
+    """Solve every agent's labor/speeding problem in one batched pass.
+
+    All agents share the same analytic objective, differing only in
+    wage rate, so a projected Newton iteration over (N,) arrays replaces
+    N separate scipy.optimize.minimize calls. The fine schedule must be
+    affine in income (fine = base + slope * income), which both built-in
+    fine functions are.
+    """
+    # Derivatives are taken in double precision: with float32, the
+    # squared Hessian terms overflow once denom hits its floor under a
+    # large fine_rate, turning det into inf/NaN. wage_rate is stored
+    # float64, which promotes every downstream expression; only the
+    # mutable state columns stay float32.
+    w = agents.wage_rate
+    iuf = agents.income_utility_factor
+    ldf = agents.labor_disutility_factor
+    suf = agents.speeding_utility_factor
+
+    # Same starting point as the scalar solver used.
+    labor = np.full(w.shape, 1040.0, dtype=np.float32)
+    speeding = np.full(w.shape, 0.5, dtype=np.float32)
 
-        bounds = [
-            (0, 2080),
-            (0, 1),
-        ]  # Bounds for labor hours (0 to 2080) and speeding (0 to 1)
-        result = optimize.minimize(
-            objective, [1040, 0.5], method="L-BFGS-B", bounds=bounds
+    for _ in range(num_steps):
+        gross = w * labor
+        fine_rate = fine_base + fine_slope * gross
+        net = gross - fine_rate * speeding - gross * tax_rate + ubi
+        denom = np.maximum(1.0 + net, 1e-9)
+
+        net_l = w * (1.0 - tax_rate - fine_slope * speeding)
+        net_s = -fine_rate
+
+        grad_l = -ldf * labor / WORK_HOURS_PER_YEAR + iuf * net_l / denom
+        grad_s = (
+            suf / (1.0 + speeding) - death_prob * vsl + iuf * net_s / denom
         )
 
-        self.labor_supply, self.speeding = result.x
-        self.fine = np.float64(
-            fine_function(self.wage_rate * self.labor_supply) * self.speeding
+        hess_ll = -ldf / WORK_HOURS_PER_YEAR - iuf * (net_l / denom) ** 2
+        hess_ss = (
+            -suf / (1.0 + speeding) ** 2 - iuf * (net_s / denom) ** 2
+        )
+        hess_ls = iuf * (
+            -fine_slope * w / denom - net_l * net_s / denom**2
         )
-        return -result.fun  # Return the utility
+
+        # Active-set projection: a variable sitting on a bound with its
+        # gradient pointing outward takes no step, and its cross term
+        # is dropped so the free variable gets the plain 1-D Newton
+        # step. Without this, hess_ls mixes the pinned gradient into
+        # the free update and the iterate can stick at a corner that is
+        # not the constrained optimum (labor collapsing to 0 under
+        # large flat fines). The scalar Agent.optimize sweeps one
+        # variable at a time and is immune by construction.
+        pin_l = ((labor <= 0.0) & (grad_l < 0.0)) | (
+            (labor >= 2080.0) & (grad_l > 0.0)
+        )
+        pin_s = ((speeding <= 0.0) & (grad_s < 0.0)) | (
+            (speeding >= 1.0) & (grad_s > 0.0)
+        )
+        grad_l = np.where(pin_l, 0.0, grad_l)
+        grad_s = np.where(pin_s, 0.0, grad_s)
+        hess_ls = np.where(pin_l | pin_s, 0.0, hess_ls)
+
+        det = hess_ll * hess_ss - hess_ls**2
+        # Closed-form 2x2 Newton step; fall back to a gradient-ascent
+        # step where the Hessian is (near-)singular. np.where evaluates
+        # both branches eagerly, so silence the divide warnings from the
+        # unselected one.
+        safe = np.abs(det) > 1e-12
+        with np.errstate(divide="ignore", invalid="ignore"):
+            step_l = np.where(
+                safe, (hess_ss * grad_l - hess_ls * grad_s) / det, -grad_l
+            )
+            step_s = np.where(
+                safe, (hess_ll * grad_s - hess_ls * grad_l) / det, -grad_s
+            )
+
+        # A large fine can push net income onto the log floor, where the
+        # barrier swamps the quadratic model and the Newton step stalls
+        # at machine precision. Use the scalar solver's closed-form
+        # speeding response there instead; it exits the floored region
+        # in one move and the next iteration proceeds normally.
+        floored = net <= -1.0
+        marginal_cost = death_prob * vsl + iuf * fine_rate / denom
+        closed_s = np.clip(
+            suf / np.maximum(marginal_cost, 1e-300) - 1.0, 0.0, 1.0
+        )
+        step_l = np.where(floored, 0.0, step_l)
+        step_s = np.where(floored, speeding - closed_s, step_s)
+
+        # Apply the step and project back onto the box in place, so the
+        # state arrays are allocated once for the whole solve.
+        labor -= step_l
+        np.clip(labor, 0.0, 2080.0, out=labor)
+        speeding -= step_s
+        np.clip(speeding, 0.0, 1.0, out=speeding)
+
+    gross = w * labor
+    fine = (fine_base + fine_slope * gross) * speeding
+    # The population utility formula lives on AgentArray; evaluate the
+    # optimum through it rather than duplicating it here.
+    utility = agents.calculate_utility(
+        labor,
+        speeding,
+        lambda g: fine_base + fine_slope * g,
+        death_prob,
+        ubi,
+        tax_rate,
+        vsl,
+    )
+    # gross is returned so callers can reuse it as the tax base rather
+    # than recomputing wage * labor.
+    return labor, speeding, fine, utility, gross
 
 
 def simulate_society(
@@ -90,67 +394,69 @@ def simulate_society(
     labor_disutility_factor,
     speeding_utility_factor,
     vsl,
+    agents=None,
+    tol=1e-4,
 ):
     try:
-        agents = [
-            Agent(
-                income,
+        if agents is None:
+            agents = AgentArray.from_incomes(
+                incomes,
                 income_utility_factor,
                 labor_disutility_factor,
                 speeding_utility_factor,
             )
-            for income in incomes
-        ]
+        else:
+            # Reusing a caller-owned population: clear its state so the
+            # equilibrium path matches a fresh construction.
+            agents.reset()
         total_fines = 0.0
         total_tax = 0.0
         total_utility = 0.0
 
+        # Both built-in fine functions are affine in income; recover the
+        # coefficients once so the batched solver can stay vectorized.
+        fine_base = fine_function(0.0, fine_params)
+        fine_slope = fine_function(1.0, fine_params) - fine_base
+
         for iteration in range(num_iterations):
-            death_prob = np.float64(
-                death_prob_factor
-                * sum(a.speeding for a in agents)
-                / len(agents)
-            )
-            ubi = np.float64((total_fines + total_tax) / len(agents))
-
-            for agent in agents:
-                utility = agent.optimize(
-                    lambda income: fine_function(income, fine_params),
-                    death_prob,
-                    ubi,
-                    tax_rate,
-                    vsl,
-                )
-                agent.labor_supply = np.clip(agent.labor_supply, 0, 1)
-                agent.speeding = np.clip(agent.speeding, 0, 1)
-
-            total_fines = np.float64(sum(a.fine for a in agents))
-            total_tax = np.float64(
-                sum(a.income * a.labor_supply * tax_rate for a in agents)
-            )
-            total_utility = np.float64(
-                sum(
-                    agent.calculate_utility(
-                        agent.labor_supply,
-                        agent.speeding,
-                        lambda income: fine_function(income, fine_params),
-                        death_prob,
-                        ubi,
-                        tax_rate,
-                        vsl,
-                    )
-                    for agent in agents
-                )
+            death_prob = death_prob_factor * agents.speeding.mean()
+            ubi = (total_fines + total_tax) / len(agents)
+
+            labor, speeding, fine, utility, gross = _optimize_population(
+                agents, fine_base, fine_slope, death_prob, ubi, tax_rate, vsl
             )
+            agents.labor_supply[:] = labor
+            agents.speeding[:] = speeding
+            agents.fine[:] = fine
+
+            # The solver already enforces the bounds; the speeding clip
+            # stays only as a cheap rounding guard. Clipping labor to
+            # [0, 1] here would collapse hour-denominated supply.
+            np.clip(agents.speeding, 0, 1, out=agents.speeding)
+
+            total_fines = agents.fine.sum(dtype=np.float64)
+            total_tax = gross.sum(dtype=np.float64) * tax_rate
+            # The solver already evaluated utility at the optimum; no
+            # second utility pass needed. Accumulate in double so the
+            # float32 state does not degrade the population totals.
+            total_utility = utility.sum(dtype=np.float64)
 
             print(
                 f"Iteration {iteration + 1}: Death prob: {death_prob:.6f}, UBI: {ubi:.2f}, Total utility: {total_utility:.2f}"
             )
 
+            # The equilibrium usually settles well before num_iterations;
+            # stop once the utility total has stopped moving.
+            if iteration > 0 and abs(total_utility - prev_utility) < tol * (
+                abs(prev_utility) + 1e-9
+            ):
+                break
+            prev_utility = total_utility
+
         return {
-            "total_utility": np.float64(total_utility),
-            "avg_speeding": np.float64(np.mean([a.speeding for a in agents])),
-            "avg_labor": np.float64(np.mean([a.labor_supply for a in agents])),
+            "total_utility": total_utility,
+            "avg_speeding": agents.speeding.mean(),
+            "avg_labor": agents.labor_supply.mean(),
             "agents": agents,
         }
     except Exception as e:
@@ -1,5 +1,7 @@
+import numpy as np
 from scipy import optimize
-from model import simulate_society
+
+from model import AgentArray, simulate_society
 
 
 class ObjectiveFunction:
@@ -24,11 +26,49 @@ class ObjectiveFunction:
         self.labor_disutility_factor = labor_disutility_factor
         self.speeding_utility_factor = speeding_utility_factor
         self.vsl = vsl
-        self.optimization_history = []
+        # One population reused (and reset) across all evaluations
+        # instead of reallocating the columns per simulation.
+        self._agents = AgentArray.from_incomes(
+            incomes,
+            income_utility_factor,
+            labor_disutility_factor,
+            speeding_utility_factor,
+        )
+        # History rows are [*params, utility] in one contiguous buffer,
+        # grown by doubling; optimization_history exposes the filled view.
+        self._history = None
+        self._n_evals = 0
+        self.best_utility = -float("inf")
+        self.best_result = None
+        # The optimizer re-probes identical points during line searches
+        # and gradient estimation; each one is a full simulation, so
+        # memoize by (rounded) parameter vector.
+        self._cache = {}
+
+    @property
+    def optimization_history(self):
+        if self._history is None:
+            return np.empty((0, 0))
+        return self._history[: self._n_evals]
+
+    def _record(self, params, utility):
+        if self._history is None:
+            self._history = np.empty((512, len(params) + 1))
+        elif self._n_evals == len(self._history):
+            self._history = np.concatenate(
+                [self._history, np.empty_like(self._history)]
+            )
+        self._history[self._n_evals, :-1] = params
+        self._history[self._n_evals, -1] = utility
+        self._n_evals += 1
 
     def __call__(self, params):
         print(f"Objective function called with params: {params}")
 
+        key = np.round(np.asarray(params, dtype=np.float64), 8).tobytes()
+        if key in self._cache:
+            return self._cache[key]
+
         if len(params) == 2:  # Flat fine
             fine_params = [params[0]]
             tax_rate = params[1]
@@ -50,10 +90,19 @@ class ObjectiveFunction:
                 self.labor_disutility_factor,
                 self.speeding_utility_factor,
                 self.vsl,
+                agents=self._agents,
             )
             utility = result["total_utility"]
             print(f"Simulation result: {result}")
-            self.optimization_history.append((params, utility))
+            self._record(params, utility)
+            if utility > self.best_utility:
+                self.best_utility = utility
+                # Snapshot the agent state: the shared population will
+                # be overwritten by later evaluations.
+                self.best_result = dict(
+                    result, agents=result["agents"].copy()
+                )
+            self._cache[key] = -utility
             return -utility
         except Exception as e:
             print(f"Error in simulate_society: {e}")
@@ -98,12 +147,22 @@ def optimize_fine(
     print(f"Initial params: {initial_params}")
     print(f"Optimization bounds: {bounds}")
 
+    # Each objective evaluation runs a full simulation, so a
+    # derivative-free method beats L-BFGS-B here: no finite-difference
+    # probes (4-6 extra simulations per step) wasted on a noisy surface.
     result = optimize.minimize(
         objective,
         initial_params,
-        method="L-BFGS-B",
+        method="Powell",
         bounds=bounds,
         options={"maxiter": 100, "disp": True},
     )
 
-    return result.x, -result.fun, objective.optimization_history
+    # The simulation at the best parameters has already been run inside
+    # the objective; hand it back so callers need not re-simulate.
+    return (
+        result.x,
+        -result.fun,
+        objective.optimization_history,
+        objective.best_result,
+    )
@@ -0,0 +1,84 @@
+import unittest
+
+import numpy as np
+
+from model import Agent, AgentArray, _optimize_population
+from utils import (
+    DEFAULT_INCOME_UTILITY_FACTOR,
+    DEFAULT_LABOR_DISUTILITY_FACTOR,
+    DEFAULT_SPEEDING_UTILITY_FACTOR,
+    DEFAULT_VSL,
+)
+
+
+class TestBatchedSolver(unittest.TestCase):
+    """The batched solve must agree with the scalar Agent.optimize.
+
+    Large flat fines once drove the 2x2 Newton iterate into the
+    labor=0 corner via the Hessian cross term; the scalar Gauss-Seidel
+    solver never exhibited the collapse, so it serves as the reference.
+    """
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.incomes = rng.lognormal(np.log(70_000), 0.5, 50)
+        self.agents = AgentArray.from_incomes(
+            self.incomes,
+            DEFAULT_INCOME_UTILITY_FACTOR,
+            DEFAULT_LABOR_DISUTILITY_FACTOR,
+            DEFAULT_SPEEDING_UTILITY_FACTOR,
+        )
+
+    def _scalar_reference(self, fine_base, fine_slope, death_prob, ubi, tax_rate):
+        labor, speeding, utility = [], [], []
+        for income in self.incomes:
+            agent = Agent(
+                income,
+                DEFAULT_INCOME_UTILITY_FACTOR,
+                DEFAULT_LABOR_DISUTILITY_FACTOR,
+                DEFAULT_SPEEDING_UTILITY_FACTOR,
+            )
+            utility.append(
+                agent.optimize(
+                    lambda x: fine_base + fine_slope * x,
+                    death_prob,
+                    ubi,
+                    tax_rate,
+                    DEFAULT_VSL,
+                )
+            )
+            labor.append(agent.labor_supply)
+            speeding.append(agent.speeding)
+        return np.array(labor), np.array(speeding), np.array(utility)
+
+    def test_matches_scalar_solver_at_large_fine_rates(self):
+        # Spans the optimizer's search range, including rates that used
+        # to trigger the corner collapse (>= ~300).
+        for fine_base in [0.0, 300.0, 5_000.0, 20_000.0, 400_000.0]:
+            with self.subTest(fine_base=fine_base):
+                labor, speeding, _, utility, _ = _optimize_population(
+                    self.agents, fine_base, 0.0, 1e-6, 0.0, 0.3, DEFAULT_VSL
+                )
+                ref_labor, ref_speeding, ref_utility = self._scalar_reference(
+                    fine_base, 0.0, 1e-6, 0.0, 0.3
+                )
+                np.testing.assert_allclose(labor, ref_labor, atol=1.0)
+                np.testing.assert_allclose(speeding, ref_speeding, atol=1e-3)
+                np.testing.assert_allclose(
+                    utility, ref_utility, rtol=1e-3, atol=1e-3
+                )
+
+    def test_matches_scalar_solver_income_based(self):
+        labor, speeding, _, utility, _ = _optimize_population(
+            self.agents, 100.0, 0.01, 1e-7, 100.0, 0.3, DEFAULT_VSL
+        )
+        ref_labor, ref_speeding, ref_utility = self._scalar_reference(
+            100.0, 0.01, 1e-7, 100.0, 0.3
+        )
+        np.testing.assert_allclose(labor, ref_labor, atol=1.0)
+        np.testing.assert_allclose(speeding, ref_speeding, atol=1e-3)
+        np.testing.assert_allclose(utility, ref_utility, rtol=1e-3, atol=1e-3)
+
+
+if __name__ == "__main__":
+    unittest.main()
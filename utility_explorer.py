@@ -122,25 +122,25 @@ class UtilityExplorer(Agent):
         ax.set_ylabel("Utility")
         ax.set_title("Utility Components")
         plt.xticks(rotation=45, ha="right")
-        st.pyplot(fig)
+        st.pyplot(fig, clear_figure=True)
+        plt.close(fig)
 
     def plot_labor_supply_vs_utility(
         self, tax_rate, fine_rate, speeding, death_prob, vsl
     ):
         labor_range = np.linspace(0, WORK_HOURS_PER_YEAR, 100)
-        labor_utilities = [
-            self.calculate_utility(
-                l, speeding, lambda x: fine_rate, death_prob, 0, tax_rate, vsl
-            )
-            for l in labor_range
-        ]
+        labor_utilities = self.calculate_utility_curve(
+            labor_range, speeding, lambda x: fine_rate, death_prob, 0,
+            tax_rate, vsl,
+        )
 
         fig, ax = plt.subplots()
         ax.plot(labor_range / WORK_HOURS_PER_YEAR, labor_utilities)
         ax.set_xlabel("Labor Supply (fraction of total work hours)")
         ax.set_ylabel("Utility")
         ax.set_title("Labor Supply vs Utility")
-        st.pyplot(fig)
+        st.pyplot(fig, clear_figure=True)
+        plt.close(fig)
 
 
 def utility_explorer():
@@ -25,7 +25,19 @@ DEFAULT_SPEEDING_UTILITY_FACTOR = 1.0
 DEFAULT_LABOR_DISUTILITY_FACTOR = 1 / WORK_HOURS_PER_YEAR
 
 
-def generate_incomes(num_agents, mean, std):
-    return np.random.lognormal(
+def generate_incomes(num_agents, mean, std, seed=None):
+    rng = np.random.default_rng(seed)
+    return rng.lognormal(
         mean=np.log(mean), sigma=np.log(std / mean + 1), size=num_agents
     )
+
+
+def calculate_gini(values):
+    """Gini coefficient via sort + cumulative sum (O(N log N)).
+
+    Avoids the O(N^2) pairwise-difference formulation.
+    """
+    values = np.sort(np.asarray(values, dtype=np.float64))
+    n = values.size
+    cum = np.cumsum(values)
+    return (n + 1 - 2 * np.sum(cum) / cum[-1]) / n
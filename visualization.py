@@ -1,11 +1,15 @@
 import matplotlib.pyplot as plt
 import numpy as np
 import seaborn as sns
+import streamlit as st
+
+from utils import calculate_gini
 
 
 def plot_optimization_progress(history):
+    utilities = history[:, -1]
     plt.figure(figsize=(10, 6))
-    plt.plot([i for i in range(len(history))], [util for _, util in history])
+    plt.plot(np.arange(utilities.size), utilities)
     plt.title("Optimization Progress")
     plt.xlabel("Iteration")
     plt.ylabel("Utility")
@@ -15,11 +19,11 @@ def plot_optimization_progress(history):
 def plot_agent_distributions(agents):
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
 
-    sns.histplot([a.labor_supply for a in agents], ax=ax1, kde=True)
+    sns.histplot(agents.labor_supply, ax=ax1, kde=True)
     ax1.set_title("Distribution of Labor Supply")
     ax1.set_xlabel("Labor Supply")
 
-    sns.histplot([a.speeding for a in agents], ax=ax2, kde=True)
+    sns.histplot(agents.speeding, ax=ax2, kde=True)
     ax2.set_title("Distribution of Speeding")
     ax2.set_xlabel("Speeding")
 
@@ -27,56 +31,82 @@ def plot_agent_distributions(agents):
     plt.show()
 
 
+@st.cache_data(max_entries=8)
 def plot_results(flat_history, income_history, initial_flat_fine):
-    plt.figure(figsize=(15, 6))
-
-    # Flat fines
-    plt.subplot(1, 2, 1)
-    flat_rates = [params[0] for params, _ in flat_history]
-    flat_utilities = [utility for _, utility in flat_history]
-    plt.scatter(flat_rates, flat_utilities, alpha=0.5)
-    plt.title("Utility vs Flat Fine Rate")
-    plt.xlabel("Fine Rate")
-    plt.ylabel("Total Utility")
-    plt.axvline(
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
+
+    # Flat fines; history rows are [*params, utility].
+    ax1.scatter(flat_history[:, 0], flat_history[:, -1], alpha=0.5)
+    ax1.set_title("Utility vs Flat Fine Rate")
+    ax1.set_xlabel("Fine Rate")
+    ax1.set_ylabel("Total Utility")
+    ax1.axvline(
         x=initial_flat_fine, color="r", linestyle="--", label="Initial Fine"
     )
-    plt.legend()
+    ax1.legend()
 
     # Income-based fines
-    plt.subplot(1, 2, 2)
-    base_rates = [params[0] for params, _ in income_history]
-    income_factors = [params[1] for params, _ in income_history]
-    utilities = [utility for _, utility in income_history]
-    plt.scatter(
-        base_rates, income_factors, c=utilities, cmap="viridis", alpha=0.5
+    scatter = ax2.scatter(
+        income_history[:, 0],
+        income_history[:, 1],
+        c=income_history[:, -1],
+        cmap="viridis",
+        alpha=0.5,
     )
-    plt.colorbar(label="Total Utility")
-    plt.title("Utility for Income-Based Fines")
-    plt.xlabel("Base Rate")
-    plt.ylabel("Income Factor")
+    fig.colorbar(scatter, ax=ax2, label="Total Utility")
+    ax2.set_title("Utility for Income-Based Fines")
+    ax2.set_xlabel("Base Rate")
+    ax2.set_ylabel("Income Factor")
 
-    plt.tight_layout()
-    plt.show()
+    fig.tight_layout()
+    # Drop the figure from pyplot's global registry so cached figures do
+    # not accumulate across reruns; the returned Figure stays renderable.
+    plt.close(fig)
+    return fig
 
 
 def analyze_income_groups(agents):
-    agents.sort(key=lambda a: a.income)
-    low_income = agents[: len(agents) // 3]
-    mid_income = agents[len(agents) // 3 : 2 * len(agents) // 3]
-    high_income = agents[2 * len(agents) // 3 :]
-
-    for group, name in [
-        (low_income, "Low"),
-        (mid_income, "Middle"),
-        (high_income, "High"),
-    ]:
-        print(f"\n{name} income group:")
-        avg_income = np.mean([a.income for a in group])
-        avg_labor = np.mean([a.labor_supply for a in group])
-        print(f"  Average potential income: {avg_income:.2f}")
-        print(f"  Average labor supply: {avg_labor:.2f}")
-        print(f"  Average actual income: {avg_income * avg_labor:.2f}")
-        print(
-            f"  Average speeding: {np.mean([a.speeding for a in group]):.2f}"
+    print(
+        f"Income Gini coefficient: "
+        f"{calculate_gini(agents.potential_income):.3f}"
+    )
+
+    # Group membership is precomputed once per population; each metric
+    # aggregates in a single np.bincount pass. All metrics live in one
+    # (n_groups, n_metrics) array so consumers slice columns instead of
+    # re-deriving per-group lists.
+    idx = agents.group_index
+    sizes = np.bincount(idx, minlength=3)
+    avg_incomes = (
+        np.bincount(idx, weights=agents.potential_income, minlength=3) / sizes
+    )
+    avg_labors = (
+        np.bincount(idx, weights=agents.labor_supply, minlength=3) / sizes
+    )
+    avg_speedings = (
+        np.bincount(idx, weights=agents.speeding, minlength=3) / sizes
+    )
+    # Actual income is wage * hours worked; multiplying annual potential
+    # income by hour-denominated labor would double-count the year.
+    avg_actual_incomes = (
+        np.bincount(
+            idx, weights=agents.wage_rate * agents.labor_supply, minlength=3
         )
+        / sizes
+    )
+    stats = np.column_stack(
+        [avg_incomes, avg_labors, avg_actual_incomes, avg_speedings]
+    )
+
+    metric_labels = [
+        "Average potential income",
+        "Average labor supply",
+        "Average actual income",
+        "Average speeding",
+    ]
+    for i, name in enumerate(["Low", "Middle", "High"]):
+        print(f"\n{name} income group:")
+        for label, value in zip(metric_labels, stats[i]):
+            print(f"  {label}: {value:.2f}")
+
+    return stats